@@ -4,35 +4,103 @@ Library Management System (Tkinter + SQLite + Google Books API)
 
 import sqlite3
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from datetime import date, timedelta
-from urllib.request import urlopen, Request
-from urllib.error import URLError
+from http.client import HTTPSConnection, HTTPException
+from urllib.parse import urlsplit, urlencode
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import threading
 import json
-from io import BytesIO
+import csv
+import logging
+import re
 
 
 
+log = logging.getLogger(__name__)
+
 DB_FILE = "library.db"
 GOOGLE_BOOKS_URL = "https://www.googleapis.com/books/v1/volumes"
+GOOGLE_BOOKS_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+HTTP_TIMEOUT = 5.0
+ISBN_CACHE_DAYS = 30
+SCHEMA_VERSION = 2
+PAGE_SIZE = 200
+POLL_MS = 50
+IMPORT_BATCH_SIZE = 500
 
 # ---------- database ----------
-def get_conn():
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
+SQL_INSERT_BOOK = """INSERT INTO books(isbn, title, author, publisher, publication_year, category, description, cover_url,
+    total_copies, available_copies)
+    VALUES(?,?,?,?,?,?,?,?,?,?)"""
+# Bulk import skips rows whose ISBN already exists instead of failing the whole batch
+SQL_IMPORT_BOOK = SQL_INSERT_BOOK.replace("INSERT INTO", "INSERT OR IGNORE INTO", 1)
+SQL_SELECT_BOOKS = """SELECT book_id, IFNULL(isbn, ''), title, author, publication_year,
+    available_copies||'/'||total_copies
+    FROM books ORDER BY book_id DESC
+    LIMIT ? OFFSET ?"""
+SQL_BOOK_HAS_ISSUED = "SELECT 1 FROM transactions WHERE book_id=? AND status='issued' LIMIT 1"
+SQL_DELETE_BOOK = "DELETE FROM books WHERE book_id=?"
+SQL_BOOK_AVAILABLE = "SELECT available_copies FROM books WHERE book_id=?"
+SQL_TAKE_COPY = "UPDATE books SET available_copies=available_copies-1 WHERE book_id=?"
+SQL_RESTORE_COPY = "UPDATE books SET available_copies=available_copies+1 WHERE book_id=?"
+SQL_BOOK_COPIES = "SELECT available_copies||'/'||total_copies FROM books WHERE book_id=?"
+
+SQL_INSERT_MEMBER = """INSERT INTO members(membership_number, first_name, last_name, email, phone, address, join_date, status)
+    VALUES(?,?,?,?,?,?,?,?)"""
+SQL_SELECT_MEMBERS = """SELECT member_id, IFNULL(membership_number, ''), first_name||' '||last_name,
+    email, phone, status
+    FROM members ORDER BY member_id DESC
+    LIMIT ? OFFSET ?"""
+SQL_MEMBER_HAS_ISSUED = "SELECT 1 FROM transactions WHERE member_id=? AND status='issued' LIMIT 1"
+SQL_DELETE_MEMBER = "DELETE FROM members WHERE member_id=?"
+
+SQL_INSERT_TRANSACTION = """INSERT INTO transactions(member_id, book_id, issue_date, due_date, status)
+    VALUES(?,?,?,?,?)"""
+SQL_SELECT_TRANSACTION = "SELECT book_id, status FROM transactions WHERE transaction_id=?"
+SQL_MARK_RETURNED = "UPDATE transactions SET status='returned', return_date=? WHERE transaction_id=?"
+SQL_DELETE_TRANSACTION = "DELETE FROM transactions WHERE transaction_id=?"
+SQL_JOIN_TRANSACTIONS = """SELECT t.transaction_id, m.first_name||' '||m.last_name AS member,
+    b.title AS book, t.issue_date, t.due_date, IFNULL(t.return_date, '') AS return_date, t.status
+    FROM transactions t
+    JOIN members m ON t.member_id=m.member_id
+    JOIN books b ON t.book_id=b.book_id
+    ORDER BY t.transaction_id DESC
+    LIMIT ? OFFSET ?"""
+
+SQL_SELECT_ISBN_CACHE = "SELECT json, fetched_at FROM isbn_cache WHERE isbn=?"
+SQL_SAVE_ISBN_CACHE = "INSERT OR REPLACE INTO isbn_cache(isbn, json, fetched_at) VALUES(?,?,?)"
+
+_wal_enabled = False
+
+def get_conn(check_same_thread=True):
+    global _wal_enabled
+    # Keep every SQL_* statement above resident in sqlite3's statement cache
+    conn = sqlite3.connect(DB_FILE, cached_statements=256, check_same_thread=check_same_thread)
+
+    # WAL mode is stored in the database file, so it only needs setting once
+    if not _wal_enabled:
+        conn.execute("PRAGMA journal_mode=WAL")
+        _wal_enabled = True
+
+    # These settings are per connection
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
     return conn
 
+def book_row(isbn, title, author, publisher, year, category, description, cover_url, copies):
+    """Parameters for SQL_INSERT_BOOK; a new book starts with every copy available"""
+    copies = int(copies or 1)
+    return (isbn or None, title, author, publisher, year, category, description, cover_url, copies, copies)
+
 def init_db():
     conn = get_conn()
     c = conn.cursor()
 
-    # Drop existing tables if they have wrong structure
-    c.execute("DROP TABLE IF EXISTS books")
-    c.execute("DROP TABLE IF EXISTS members")
-    c.execute("DROP TABLE IF EXISTS transactions")
-
-    # Recreate tables with correct structure
-    c.execute("""CREATE TABLE books(
+    # Create tables only on first run; existing data is kept between launches
+    c.execute("""CREATE TABLE IF NOT EXISTS books(
         book_id INTEGER PRIMARY KEY AUTOINCREMENT,
         isbn TEXT UNIQUE, 
         title TEXT, 
@@ -46,7 +114,7 @@ def init_db():
         available_copies INTEGER
     )""")
 
-    c.execute("""CREATE TABLE members(
+    c.execute("""CREATE TABLE IF NOT EXISTS members(
         member_id INTEGER PRIMARY KEY AUTOINCREMENT,
         membership_number TEXT UNIQUE,
         first_name TEXT, 
@@ -58,7 +126,7 @@ def init_db():
         status TEXT
     )""")
 
-    c.execute("""CREATE TABLE transactions(
+    c.execute("""CREATE TABLE IF NOT EXISTS transactions(
         transaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
         member_id INTEGER, 
         book_id INTEGER,
@@ -69,42 +137,130 @@ def init_db():
         status TEXT
     )""")
 
+    # Google Books responses, so repeated lookups skip the network
+    c.execute("""CREATE TABLE IF NOT EXISTS isbn_cache(
+        isbn TEXT PRIMARY KEY,
+        json TEXT,
+        fetched_at TEXT
+    )""")
+
+    # Indexes for the "is anything still issued?" checks and the transactions JOIN
+    c.execute("CREATE INDEX IF NOT EXISTS ix_tx_book_status ON transactions(book_id, status)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_tx_member_status ON transactions(member_id, status)")
+
+    # Schema migrations: only run when the stored version is behind
+    version = c.execute("PRAGMA user_version").fetchone()[0]
+    if version < 2:
+        # Gather statistics so the planner picks up the new indexes on existing data
+        c.execute("ANALYZE")
+    if version < SCHEMA_VERSION:
+        c.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
     conn.commit()
     conn.close()
-    print("Database initialized successfully!")
+    log.debug("Database initialized")
 
 # Initialize database before running the app
 init_db()
 
 # ---------- Google Books lookup ----------
+# Book form field -> key in the dict returned by lookup_book()
+LOOKUP_FIELDS = (("Title", "title"), ("Author", "author"), ("Publisher", "publisher"),
+                 ("Year", "publication_year"), ("Category", "category"))
+
+def normalize_isbn(isbn):
+    """Drop dashes and spaces so every spelling of an ISBN shares one cache entry"""
+    return isbn.replace("-", "").replace(" ", "").upper()
+
+def valid_isbn(isbn):
+    """Check an ISBN-10 or ISBN-13 (dashes and spaces allowed) against its check digit"""
+    digits = normalize_isbn(isbn)
+    # re.ASCII keeps \d to 0-9; str.isdigit() also accepts e.g. superscripts that int() rejects
+    if re.fullmatch(r"\d{9}[\dX]", digits, re.ASCII):
+        values = [int(d) for d in digits[:9]] + [10 if digits[9] == "X" else int(digits[9])]
+        return sum((10 - i) * v for i, v in enumerate(values)) % 11 == 0
+    if re.fullmatch(r"\d{13}", digits, re.ASCII):
+        return sum((3 if i % 2 else 1) * int(d) for i, d in enumerate(digits)) % 10 == 0
+    return False
+
+_google_books = urlsplit(GOOGLE_BOOKS_URL)
+_local = threading.local()
+
+def google_books_get(path, headers):
+    """GET from Google Books over a kept-alive HTTPS connection (one per thread)"""
+    conn = getattr(_local, "http", None)
+    if conn is None:
+        conn = _local.http = HTTPSConnection(_google_books.netloc, timeout=HTTP_TIMEOUT)
+
+    try:
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+        except (HTTPException, ConnectionError):
+            # The server may have dropped the idle connection; retry once on a fresh one
+            conn.close()
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+        return response.status, response.read()
+    except Exception:
+        conn.close()
+        raise
+
+def fetch_book(isbn):
+    """Query Google Books directly; returns None when the ISBN has no match"""
+    # urlencode escapes anything odd the user typed instead of producing a broken request line
+    path = f"{_google_books.path}?{urlencode({'q': f'isbn:{isbn}'})}"
+    status, body = google_books_get(path, GOOGLE_BOOKS_HEADERS)
+    if status != 200:
+        raise HTTPException(f"HTTP {status}")
+
+    # json accepts the raw UTF-8 bytes, so skip building an intermediate str
+    data = json.loads(body)
+
+    items = data.get("items")
+    if not items:
+        return None
+
+    vol = items[0]["volumeInfo"]
+    return {
+        "title": vol.get("title", ""),
+        "author": ", ".join(vol.get("authors", [])),
+        "publisher": vol.get("publisher", ""),
+        "publication_year": vol.get("publishedDate", "")[:4],
+        "category": ", ".join(vol.get("categories", [])),
+        "description": vol.get("description", ""),
+        "cover_url": vol.get("imageLinks", {}).get("thumbnail")
+    }
+
+@lru_cache(maxsize=1024)
+def cached_book(isbn):
+    """fetch_book() backed by the isbn_cache table; errors are raised, not cached"""
+    db = getattr(_local, "db", None)
+    if db is None:
+        db = _local.db = get_conn()
+
+    row = db.execute(SQL_SELECT_ISBN_CACHE, (isbn,)).fetchone()
+    if row:
+        cached_json, fetched_at = row
+        if date.fromisoformat(fetched_at) >= date.today() - timedelta(days=ISBN_CACHE_DAYS):
+            return json.loads(cached_json)
+
+    book = fetch_book(isbn)
+    if book:
+        with db:
+            db.execute(SQL_SAVE_ISBN_CACHE, (isbn, json.dumps(book), str(date.today())))
+    return book
+
 def lookup_book(isbn):
-    """Alternative lookup without requests module"""
+    """Normalize the ISBN and return its book dict from the cache or Google Books; logs errors and returns None"""
+    isbn = normalize_isbn(isbn)
     try:
-        url = f"{GOOGLE_BOOKS_URL}?q=isbn:{isbn}"
-        req = Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-
-        with urlopen(req) as response:
-            data = json.loads(response.read().decode())
-
-        items = data.get("items")
-        if not items:
-            return None
-
-        vol = items[0]["volumeInfo"]
-        return {
-            "title": vol.get("title", ""),
-            "author": ", ".join(vol.get("authors", [])),
-            "publisher": vol.get("publisher", ""),
-            "publication_year": vol.get("publishedDate", "")[:4],
-            "category": ", ".join(vol.get("categories", [])),
-            "description": vol.get("description", ""),
-            "cover_url": vol.get("imageLinks", {}).get("thumbnail")
-        }
-    except URLError as e:
-        print("Lookup error:", e)
+        return cached_book(isbn)
+    except (HTTPException, OSError) as e:
+        log.warning("Lookup error for ISBN %s: %s", isbn, e)
         return None
-    except Exception as e:
-        print("Error:", e)
+    except Exception:
+        log.warning("Error looking up ISBN %s", isbn, exc_info=True)
         return None
 
 # ---------- main app ----------
@@ -115,11 +271,13 @@ class LibraryApp(tk.Tk):
         self.geometry("1100x650")
 
         # Initialize instance attributes
+        self.nb = None
         self.book_tab = None
         self.member_tab = None
         self.trans_tab = None
         self.isbn_var = None
         self.book_tree = None
+        self.book_iids = {}
         self.book_vars = {}
         self.desc_txt = None
         self.cover_label = None
@@ -129,15 +287,72 @@ class LibraryApp(tk.Tk):
         self.mem_vars = {}
         self.selected_member = None
         self.tr_tree = None
+        self.tab_names = {}
+        self.tab_refresh = {}
+        # Tabs whose tree is out of date; each is refreshed the next time it is shown
+        self.dirty_tabs = {"books": True, "members": True, "transactions": True}
+        # Current page of each tab; trees only ever hold PAGE_SIZE rows
+        self.pages = {"books": 0, "members": 0, "transactions": 0}
+
+        # One connection for the lifetime of the window, shared with the write worker
+        self.conn = get_conn(check_same_thread=False)
+        self.db_lock = threading.Lock()
+        # Writes run on a single worker (SQLite allows one writer at a time),
+        # Google Books requests on another, so the window stays responsive
+        self.db_executor = ThreadPoolExecutor(max_workers=1)
+        self.lookup_executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = []
+        self.polling = False
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.create_widgets()
-        self.refresh_books()
-        self.refresh_members()
-        self.refresh_transactions()
+        self.on_tab_changed()
+
+    def on_close(self):
+        self.lookup_executor.shutdown(wait=False, cancel_futures=True)
+        # Let queued writes finish before the connection goes away
+        self.db_executor.shutdown(wait=True)
+        with self.db_lock:
+            # Let SQLite refresh planner statistics if the data has shifted enough
+            self.conn.execute("PRAGMA optimize")
+            self.conn.close()
+        self.destroy()
+
+    def run_in_background(self, executor, callback, fn, *args):
+        """Run fn(*args) on executor and pass the finished future to callback on the Tk thread"""
+        # Workers never touch Tk; the Tk thread polls for finished futures instead
+        self.pending.append((executor.submit(fn, *args), callback))
+        if not self.polling:
+            self.polling = True
+            self.after(POLL_MS, self.poll_background)
+
+    def poll_background(self):
+        done = [item for item in self.pending if item[0].done()]
+        self.pending = [item for item in self.pending if item not in done]
+        try:
+            for future, callback in done:
+                try:
+                    callback(future)
+                except Exception:
+                    # One broken callback must not stop the others or the polling loop
+                    log.warning("Error in background task callback", exc_info=True)
+        finally:
+            if self.pending:
+                self.after(POLL_MS, self.poll_background)
+            else:
+                self.polling = False
+
+    def fill_tree(self, tree, rows):
+        """Replace the contents of a Treeview with the given value tuples; returns the new item ids"""
+        # One Tcl call to clear, then raw Tcl inserts to skip ttk's option formatting
+        children = tree.get_children()
+        if children:
+            tree.delete(*children)
+        return [tree.tk.call(tree, "insert", "", "end", "-values", values) for values in rows]
 
     # ----- notebook -----
     def create_widgets(self):
-        nb = ttk.Notebook(self)
+        nb = self.nb = ttk.Notebook(self)
         nb.pack(fill="both", expand=True)
 
         self.book_tab = ttk.Frame(nb)
@@ -152,6 +367,38 @@ class LibraryApp(tk.Tk):
         self.build_members_tab()
         self.build_transactions_tab()
 
+        self.tab_names = {str(self.book_tab): "books", str(self.member_tab): "members",
+                          str(self.trans_tab): "transactions"}
+        self.tab_refresh = {"books": self.refresh_books, "members": self.refresh_members,
+                            "transactions": self.refresh_transactions}
+        self.tab_trees = {"books": self.book_tree, "members": self.mem_tree, "transactions": self.tr_tree}
+        nb.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
+    def on_tab_changed(self, event=None):
+        name = self.tab_names.get(str(self.nb.select()))
+        if name and self.dirty_tabs[name]:
+            self.dirty_tabs[name] = False
+            self.tab_refresh[name]()
+
+    def change_page(self, name, step):
+        page = self.pages[name] + step
+        if page < 0:
+            return
+        if step > 0 and len(self.tab_trees[name].get_children()) < PAGE_SIZE:
+            return  # current page is not full, so it is the last one
+        self.pages[name] = page
+        self.tab_refresh[name]()
+
+    def page_params(self, name):
+        """LIMIT/OFFSET parameters for the tab's current page"""
+        return PAGE_SIZE, self.pages[name] * PAGE_SIZE
+
+    def mark_dirty(self, *names):
+        """Flag tabs as stale; the visible one is refreshed now, the others when selected"""
+        for name in names:
+            self.dirty_tabs[name] = True
+        self.on_tab_changed()
+
     # ---------- BOOKS ----------
     def build_books_tab(self):
         frm = self.book_tab
@@ -164,7 +411,10 @@ class LibraryApp(tk.Tk):
         ttk.Button(top, text="Lookup", command=self.lookup_and_fill).pack(side=tk.LEFT, padx=4)
         ttk.Button(top, text="Add Book", command=self.add_book).pack(side=tk.LEFT, padx=4)
         ttk.Button(top, text="Delete Book", command=self.delete_book).pack(side=tk.LEFT, padx=4)
+        ttk.Button(top, text="Import CSV", command=self.import_books).pack(side=tk.LEFT, padx=4)
         ttk.Button(top, text="Refresh", command=self.refresh_books).pack(side=tk.LEFT, padx=4)
+        ttk.Button(top, text="Next", command=lambda: self.change_page("books", 1)).pack(side=tk.RIGHT, padx=4)
+        ttk.Button(top, text="Prev", command=lambda: self.change_page("books", -1)).pack(side=tk.RIGHT, padx=4)
 
         cols = ("id", "isbn", "title", "author", "year", "avail")
         self.book_tree = ttk.Treeview(frm, columns=cols, show="headings")
@@ -196,23 +446,20 @@ class LibraryApp(tk.Tk):
         isbn = self.isbn_var.get().strip()
         if not isbn:
             return
+        if not valid_isbn(isbn):
+            messagebox.showwarning("Validation", "Invalid ISBN")
+            return
+
+        self.run_in_background(self.lookup_executor, self.apply_lookup, lookup_book, isbn)
 
-        data = lookup_book(isbn)
+    def apply_lookup(self, future):
+        data = future.result()
         if not data:
             messagebox.showinfo("Not found", "No data for that ISBN")
             return
 
-        for k in ["Title", "Author", "Publisher", "Year", "Category"]:
-            if k == "Title":
-                self.book_vars[k].set(data.get("title", ""))
-            elif k == "Author":
-                self.book_vars[k].set(data.get("author", ""))
-            elif k == "Publisher":
-                self.book_vars[k].set(data.get("publisher", ""))
-            elif k == "Year":
-                self.book_vars[k].set(data.get("publication_year", ""))
-            elif k == "Category":
-                self.book_vars[k].set(data.get("category", ""))
+        for field, key in LOOKUP_FIELDS:
+            self.book_vars[field].set(data.get(key, ""))
 
         self.desc_txt.delete("1.0", "end")
         self.desc_txt.insert("end", data.get("description", ""))
@@ -225,57 +472,91 @@ class LibraryApp(tk.Tk):
             messagebox.showwarning("Validation", "Title required")
             return
 
-        conn = get_conn()
-        c = conn.cursor()
+        self.run_in_background(self.db_executor, self.after_add_book, self.do_add_book, vals,
+                               self.isbn_var.get() or None, self.desc_txt.get("1.0", "end").strip(),
+                               getattr(self, "cover_url", None))
+
+    def do_add_book(self, vals, isbn, description, cover_url):
+        self.insert_books([book_row(isbn, vals["Title"], vals["Author"], vals["Publisher"], vals["Year"],
+                                    vals["Category"], description, cover_url, vals.get("Total Copies"))])
+
+    def insert_books(self, rows, sql=SQL_INSERT_BOOK):
+        """Insert book_row() tuples in one transaction; returns how many rows were added"""
+        with self.db_lock, self.conn:
+            return self.conn.executemany(sql, rows).rowcount
+
+    def after_add_book(self, future):
         try:
-            c.execute("""INSERT INTO books(isbn, title, author, publisher, publication_year, category, description, cover_url,
-                        total_copies, available_copies)
-                        VALUES(?,?,?,?,?,?,?,?,?,?)""",
-                      (self.isbn_var.get() or None, vals["Title"], vals["Author"], vals["Publisher"], vals["Year"],
-                       vals["Category"], self.desc_txt.get("1.0", "end").strip(), getattr(self, "cover_url", None),
-                       int(vals.get("Total Copies") or 1), int(vals.get("Total Copies") or 1)))
-            conn.commit()
+            future.result()
             messagebox.showinfo("Success", "Book added")
-            self.refresh_books()
+            self.mark_dirty("books")
         except sqlite3.IntegrityError:
             messagebox.showerror("Error", "Duplicate ISBN")
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
-        finally:
-            conn.close()
 
-    def refresh_books(self):
-        # Clear existing items
-        for item in self.book_tree.get_children():
-            self.book_tree.delete(item)
+    def import_books(self):
+        path = filedialog.askopenfilename(title="Import books",
+                                          filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not path:
+            return
 
-        conn = get_conn()
-        c = conn.cursor()
+        self.run_in_background(self.db_executor, self.after_import_books, self.do_import_books, path)
+
+    def do_import_books(self, path):
+        """Load a CSV whose header uses the books column names; returns (imported, skipped)"""
+        imported = read = 0
+        batch = []
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for raw in csv.DictReader(f):
+                read += 1
+                # Stripped strings like add_book stores; missing columns/cells become "" (blank ISBN -> NULL)
+                r = {k: (v or "").strip() for k, v in raw.items() if k is not None}
+                if not r.get("title"):
+                    continue
+                try:
+                    row = book_row(r.get("isbn", ""), r["title"], r.get("author", ""), r.get("publisher", ""),
+                                   r.get("publication_year", ""), r.get("category", ""), r.get("description", ""),
+                                   r.get("cover_url") or None, r.get("total_copies", ""))
+                except ValueError:
+                    continue  # non-numeric total_copies: skip the row, keep importing
+                batch.append(row)
+                # Commit per batch so a large file doesn't hold the write lock throughout
+                if len(batch) == IMPORT_BATCH_SIZE:
+                    imported += self.insert_books(batch, SQL_IMPORT_BOOK)
+                    batch = []
+        if batch:
+            imported += self.insert_books(batch, SQL_IMPORT_BOOK)
+        return imported, read - imported
+
+    def after_import_books(self, future):
         try:
-            # Verify table structure
-            c.execute("PRAGMA table_info(books)")
-            columns = [row[1] for row in c.fetchall()]
-            print("Books table columns:", columns)
+            imported, skipped = future.result()
+            messagebox.showinfo("Import", f"Imported {imported} books ({skipped} skipped)")
+        except Exception as e:
+            messagebox.showerror("Error", f"Error importing books: {str(e)}")
+        finally:
+            # Batches committed before an error stay imported
+            self.mark_dirty("books")
 
+    def refresh_books(self):
+        try:
             # Fetch and display books
-            c.execute("SELECT * FROM books ORDER BY book_id DESC")
-            books = c.fetchall()
-
-            for book in books:
-                self.book_tree.insert("", tk.END, values=(
-                    book["book_id"],
-                    book["isbn"] or "",
-                    book["title"],
-                    book["author"],
-                    book["publication_year"],
-                    f"{book['available_copies']}/{book['total_copies']}"
-                ))
+            with self.db_lock:
+                books = self.conn.execute(SQL_SELECT_BOOKS, self.page_params("books")).fetchall()
 
+            iids = self.fill_tree(self.book_tree, books)
+            # book_id -> tree item, so issue/return can update one row in place
+            self.book_iids = {book[0]: iid for book, iid in zip(books, iids)}
         except Exception as e:
-            print("Error refreshing books:", e)
+            log.warning("Error refreshing books", exc_info=True)
             messagebox.showerror("Database Error", f"Error loading books: {str(e)}")
-        finally:
-            conn.close()
+
+    def update_book_row(self, book_id, copies):
+        """Show a book's new "available/total" without reloading the books tree"""
+        iid = self.book_iids.get(book_id)
+        if iid is not None and self.book_tree.exists(iid):
+            self.book_tree.set(iid, "avail", copies)
 
     def on_book_select(self, event):
         sel = self.book_tree.selection()
@@ -293,21 +574,27 @@ class LibraryApp(tk.Tk):
         if not messagebox.askyesno("Confirm", "Delete this book? This cannot be undone."):
             return
 
-        conn = get_conn()
-        cur = conn.cursor()
+        self.run_in_background(self.db_executor, self.after_delete_book, self.do_delete_book, book_id)
+
+    def do_delete_book(self, book_id):
+        """Returns False when the book is still issued and was left alone"""
+        with self.db_lock, self.conn:
+            cur = self.conn.cursor()
+            cur.execute(SQL_BOOK_HAS_ISSUED, (book_id,))
+            if cur.fetchone() is not None:
+                return False
+            cur.execute(SQL_DELETE_BOOK, (book_id,))
+            return True
+
+    def after_delete_book(self, future):
         try:
-            cur.execute("SELECT COUNT(*) AS cnt FROM transactions WHERE book_id=? AND status='issued'", (book_id,))
-            if cur.fetchone()[0] > 0:
+            if not future.result():
                 messagebox.showwarning("Blocked", "Cannot delete a book that is currently issued.")
             else:
-                cur.execute("DELETE FROM books WHERE book_id=?", (book_id,))
-                conn.commit()
                 messagebox.showinfo("Deleted", "Book deleted")
-                self.refresh_books()
+                self.mark_dirty("books", "transactions")
         except Exception as e:
             messagebox.showerror("Error", f"Error deleting book: {str(e)}")
-        finally:
-            conn.close()
 
     # ---------- MEMBERS ----------
     def build_members_tab(self):
@@ -318,6 +605,8 @@ class LibraryApp(tk.Tk):
         ttk.Button(top, text="Add Member", command=self.add_member).pack(side=tk.LEFT, padx=4)
         ttk.Button(top, text="Delete Member", command=self.delete_member).pack(side=tk.LEFT, padx=4)
         ttk.Button(top, text="Refresh", command=self.refresh_members).pack(side=tk.LEFT, padx=4)
+        ttk.Button(top, text="Next", command=lambda: self.change_page("members", 1)).pack(side=tk.RIGHT, padx=4)
+        ttk.Button(top, text="Prev", command=lambda: self.change_page("members", -1)).pack(side=tk.RIGHT, padx=4)
 
         cols = ("id", "num", "name", "email", "phone", "status")
         self.mem_tree = ttk.Treeview(frm, columns=cols, show="headings")
@@ -343,45 +632,30 @@ class LibraryApp(tk.Tk):
             messagebox.showwarning("Validation", "Name required")
             return
 
-        conn = get_conn()
-        c = conn.cursor()
+        self.run_in_background(self.db_executor, self.after_add_member, self.do_add_member, vals)
+
+    def do_add_member(self, vals):
+        with self.db_lock, self.conn:
+            self.conn.cursor().execute(SQL_INSERT_MEMBER,
+                                       (vals["Membership #"] or None, vals["First Name"], vals["Last Name"],
+                                        vals["Email"], vals["Phone"], vals["Address"], str(date.today()), "active"))
+
+    def after_add_member(self, future):
         try:
-            c.execute("""INSERT INTO members(membership_number, first_name, last_name, email, phone, address, join_date, status)
-                     VALUES(?,?,?,?,?,?,?,?)""",
-                  (vals["Membership #"] or None, vals["First Name"], vals["Last Name"],
-                   vals["Email"], vals["Phone"], vals["Address"], str(date.today()), "active"))
-            conn.commit()
+            future.result()
             messagebox.showinfo("Success", "Member added")
-            self.refresh_members()
+            self.mark_dirty("members")
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
-        finally:
-            conn.close()
 
     def refresh_members(self):
-        for item in self.mem_tree.get_children():
-            self.mem_tree.delete(item)
-
-        conn = get_conn()
-        c = conn.cursor()
         try:
-            c.execute("SELECT * FROM members ORDER BY member_id DESC")
-            members = c.fetchall()
-
-            for member in members:
-                name = f"{member['first_name']} {member['last_name']}"
-                self.mem_tree.insert("", tk.END, values=(
-                    member['member_id'],
-                    member['membership_number'] or "",
-                    name,
-                    member['email'],
-                    member['phone'],
-                    member['status']
-                ))
-        except Exception as e:
-            print("Error refreshing members:", e)
-        finally:
-            conn.close()
+            with self.db_lock:
+                members = self.conn.execute(SQL_SELECT_MEMBERS, self.page_params("members")).fetchall()
+
+            self.fill_tree(self.mem_tree, members)
+        except Exception:
+            log.warning("Error refreshing members", exc_info=True)
 
     def on_member_select(self, event):
         sel = self.mem_tree.selection()
@@ -399,21 +673,27 @@ class LibraryApp(tk.Tk):
         if not messagebox.askyesno("Confirm", "Delete this member?"):
             return
 
-        conn = get_conn()
-        cur = conn.cursor()
+        self.run_in_background(self.db_executor, self.after_delete_member, self.do_delete_member, member_id)
+
+    def do_delete_member(self, member_id):
+        """Returns False when the member still has issued books and was left alone"""
+        with self.db_lock, self.conn:
+            cur = self.conn.cursor()
+            cur.execute(SQL_MEMBER_HAS_ISSUED, (member_id,))
+            if cur.fetchone() is not None:
+                return False
+            cur.execute(SQL_DELETE_MEMBER, (member_id,))
+            return True
+
+    def after_delete_member(self, future):
         try:
-            cur.execute("SELECT COUNT(*) AS cnt FROM transactions WHERE member_id=? AND status='issued'", (member_id,))
-            if cur.fetchone()[0] > 0:
+            if not future.result():
                 messagebox.showwarning("Blocked", "Cannot delete a member who still has issued books.")
             else:
-                cur.execute("DELETE FROM members WHERE member_id=?", (member_id,))
-                conn.commit()
                 messagebox.showinfo("Deleted", "Member deleted")
-                self.refresh_members()
+                self.mark_dirty("members", "transactions")
         except Exception as e:
             messagebox.showerror("Error", f"Error deleting member: {str(e)}")
-        finally:
-            conn.close()
 
     # ---------- TRANSACTIONS ----------
     def build_transactions_tab(self):
@@ -425,6 +705,8 @@ class LibraryApp(tk.Tk):
         ttk.Button(top, text="Return Book", command=self.return_book).pack(side=tk.LEFT, padx=4)
         ttk.Button(top, text="Delete Transaction", command=self.delete_transaction).pack(side=tk.LEFT, padx=4)
         ttk.Button(top, text="Refresh", command=self.refresh_transactions).pack(side=tk.LEFT, padx=4)
+        ttk.Button(top, text="Next", command=lambda: self.change_page("transactions", 1)).pack(side=tk.RIGHT, padx=4)
+        ttk.Button(top, text="Prev", command=lambda: self.change_page("transactions", -1)).pack(side=tk.RIGHT, padx=4)
 
         cols = ("id", "member", "book", "issue", "due", "return", "status")
         self.tr_tree = ttk.Treeview(frm, columns=cols, show="headings")
@@ -438,31 +720,39 @@ class LibraryApp(tk.Tk):
             messagebox.showinfo("Select", "Select a member and a book")
             return
 
-        conn = get_conn()
-        c = conn.cursor()
-        try:
-            c.execute("SELECT available_copies FROM books WHERE book_id=?", (self.selected_book,))
+        self.run_in_background(self.db_executor, self.after_issue_book, self.do_issue_book,
+                               self.selected_book, self.selected_member)
+
+    def do_issue_book(self, book_id, member_id):
+        """Returns (book_id, due date, book copies text), or None when no copies are left"""
+        # Both writes commit together, or roll back together on error
+        with self.db_lock, self.conn:
+            c = self.conn.cursor()
+            c.execute(SQL_BOOK_AVAILABLE, (book_id,))
             row = c.fetchone()
-            if not row or row["available_copies"] <= 0:
-                messagebox.showinfo("Unavailable", "No copies left")
-                return
+            if not row or row[0] <= 0:
+                return None
 
             issue = str(date.today())
             due = str(date.today() + timedelta(days=14))
+            c.execute(SQL_INSERT_TRANSACTION, (member_id, book_id, issue, due, "issued"))
+            c.execute(SQL_TAKE_COPY, (book_id,))
+            return book_id, due, c.execute(SQL_BOOK_COPIES, (book_id,)).fetchone()[0]
 
-            c.execute("""INSERT INTO transactions(member_id, book_id, issue_date, due_date, status)
-                         VALUES(?,?,?,?,?)""",
-                      (self.selected_member, self.selected_book, issue, due, "issued"))
-            c.execute("UPDATE books SET available_copies=available_copies-1 WHERE book_id=?", (self.selected_book,))
-            conn.commit()
+    def after_issue_book(self, future):
+        try:
+            result = future.result()
+            if result is None:
+                messagebox.showinfo("Unavailable", "No copies left")
+                return
 
+            # Use the id the worker issued, not whatever is selected by now
+            book_id, due, copies = result
             messagebox.showinfo("Issued", f"Book issued until {due}")
-            self.refresh_books()
-            self.refresh_transactions()
+            self.update_book_row(book_id, copies)
+            self.mark_dirty("transactions")
         except Exception as e:
             messagebox.showerror("Error", f"Error issuing book: {str(e)}")
-        finally:
-            conn.close()
 
     def return_book(self):
         sel = self.tr_tree.selection()
@@ -470,28 +760,35 @@ class LibraryApp(tk.Tk):
             return
 
         tid = self.tr_tree.item(sel[0])["values"][0]
-        conn = get_conn()
-        c = conn.cursor()
-        try:
-            c.execute("SELECT * FROM transactions WHERE transaction_id=?", (tid,))
+        self.run_in_background(self.db_executor, self.after_return_book, self.do_return_book, tid)
+
+    def do_return_book(self, tid):
+        """Returns (book_id, book copies text), or None when the transaction was already returned"""
+        with self.db_lock, self.conn:
+            c = self.conn.cursor()
+            c.execute(SQL_SELECT_TRANSACTION, (tid,))
             t = c.fetchone()
 
-            if not t or t["status"] != "issued":
+            if not t or t[1] != "issued":
+                return None
+
+            book_id = t[0]
+            c.execute(SQL_MARK_RETURNED, (str(date.today()), tid))
+            c.execute(SQL_RESTORE_COPY, (book_id,))
+            return book_id, c.execute(SQL_BOOK_COPIES, (book_id,)).fetchone()[0]
+
+    def after_return_book(self, future):
+        try:
+            result = future.result()
+            if result is None:
                 messagebox.showinfo("Info", "Already returned")
                 return
 
-            c.execute("UPDATE transactions SET status='returned', return_date=? WHERE transaction_id=?",
-                      (str(date.today()), tid))
-            c.execute("UPDATE books SET available_copies=available_copies+1 WHERE book_id=?", (t["book_id"],))
-            conn.commit()
-
             messagebox.showinfo("Returned", "Book returned")
-            self.refresh_books()
-            self.refresh_transactions()
+            self.update_book_row(*result)
+            self.mark_dirty("transactions")
         except Exception as e:
             messagebox.showerror("Error", f"Error returning book: {str(e)}")
-        finally:
-            conn.close()
 
     def delete_transaction(self):
         sel = self.tr_tree.selection()
@@ -503,55 +800,43 @@ class LibraryApp(tk.Tk):
         if not messagebox.askyesno("Confirm", "Delete this transaction?"):
             return
 
-        conn = get_conn()
-        c = conn.cursor()
-        try:
-            c.execute("SELECT * FROM transactions WHERE transaction_id=?", (tid,))
+        self.run_in_background(self.db_executor, self.after_delete_transaction, self.do_delete_transaction, tid)
+
+    def do_delete_transaction(self, tid):
+        """Returns (book_id, book copies text) when a copy was restored, else None"""
+        with self.db_lock, self.conn:
+            c = self.conn.cursor()
+            c.execute(SQL_SELECT_TRANSACTION, (tid,))
             t = c.fetchone()
 
-            if t and t["status"] == "issued":
+            restored = None
+            if t and t[1] == "issued":
                 # restore availability
-                c.execute("UPDATE books SET available_copies=available_copies+1 WHERE book_id=?", (t["book_id"],))
+                book_id = t[0]
+                c.execute(SQL_RESTORE_COPY, (book_id,))
+                restored = book_id, c.execute(SQL_BOOK_COPIES, (book_id,)).fetchone()[0]
 
-            c.execute("DELETE FROM transactions WHERE transaction_id=?", (tid,))
-            conn.commit()
+            c.execute(SQL_DELETE_TRANSACTION, (tid,))
+            return restored
 
+    def after_delete_transaction(self, future):
+        try:
+            restored = future.result()
             messagebox.showinfo("Deleted", "Transaction deleted")
-            self.refresh_books()
-            self.refresh_transactions()
+            if restored:
+                self.update_book_row(*restored)
+            self.mark_dirty("transactions")
         except Exception as e:
             messagebox.showerror("Error", f"Error deleting transaction: {str(e)}")
-        finally:
-            conn.close()
 
     def refresh_transactions(self):
-        for item in self.tr_tree.get_children():
-            self.tr_tree.delete(item)
-
-        conn = get_conn()
-        c = conn.cursor()
         try:
-            q = """SELECT t.transaction_id, m.first_name||' '||m.last_name AS member,
-                 b.title AS book, t.issue_date, t.due_date, t.return_date, t.status
-                 FROM transactions t
-                 JOIN members m ON t.member_id=m.member_id
-                 JOIN books b ON t.book_id=b.book_id
-                 ORDER BY t.transaction_id DESC"""
-
-            for r in c.execute(q):
-                self.tr_tree.insert("", tk.END, values=(
-                    r["transaction_id"],
-                    r["member"],
-                    r["book"],
-                    r["issue_date"],
-                    r["due_date"],
-                    r["return_date"] or "",
-                    r["status"]
-                ))
-        except Exception as e:
-            print("Error refreshing transactions:", e)
-        finally:
-            conn.close()
+            with self.db_lock:
+                rows = self.conn.execute(SQL_JOIN_TRANSACTIONS, self.page_params("transactions")).fetchall()
+
+            self.fill_tree(self.tr_tree, rows)
+        except Exception:
+            log.warning("Error refreshing transactions", exc_info=True)
 
 # ---------- run ----------
 if __name__ == "__main__":